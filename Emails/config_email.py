@@ -2,9 +2,17 @@
 Configuration settings for the email module.
 """
 import os
-from pydantic_settings import BaseSettings
+import logging
+from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict, NoDecode
 from pydantic import EmailStr, field_validator
-from typing import List
+from typing import Annotated, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Dossiers déjà vérifiés : évite de refaire les appels système
+_checked = set()
 
 
 class EmailSettings(BaseSettings):
@@ -35,16 +43,20 @@ class EmailSettings(BaseSettings):
     
     # ==== DESTINATAIRES INTERNES ===
     # Emails qui recevront les soumissions de formulaires
-    MAIL_RECIPIENTS_CONTACT: str
+    # NoDecode : la variable est une liste séparée par des virgules, pas du JSON
+    MAIL_RECIPIENTS_CONTACT: Annotated[List[EmailStr], NoDecode]
     
-    @field_validator('MAIL_RECIPIENTS_CONTACT')
+    @field_validator('MAIL_RECIPIENTS_CONTACT', mode="before")
     @classmethod
-    def parse_recipients(cls, v: str) -> List[str]:
-        # Convertit la chaîne en liste d'emails
+    def parse_recipients(cls, v):
+        # Convertit la chaîne en liste, chaque élément est ensuite
+        # validé comme EmailStr par Pydantic
+        if not isinstance(v, str):
+            return v
         if not v:
             return []
-        # Nettoie les espaces et split par les virgules
-        return [email.strip() for email in v.split(',')]
+        # Split par les virgules (EmailStr retire les espaces)
+        return v.split(',')
     
     # === TEMPLATES ===
     # Dossier contenant les modèles HTML d'emails (relatif au dossier Emails)
@@ -53,26 +65,51 @@ class EmailSettings(BaseSettings):
     @field_validator('MAIL_TEMPLATES_DIR')
     @classmethod
     def validate_template_dir(cls, v: str) -> str:
-        """Valide et crée le dossier templates si nécessaire"""
-        # Si c'est un chemin relatif, le rendre absolu
-        if not os.path.isabs(v):
-            # Utiliser le dossier Emails comme base (où se trouve ce fichier)
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            v = os.path.join(base_dir, v)
-        
-        # Créer le dossier s'il n'existe pas
-        if not os.path.exists(v):
-            os.makedirs(v, exist_ok=True)
-            print(f"Dossier templates créé: {v}")
-        
-        return v
+        """
+        Rend le chemin du dossier templates absolu
+
+        Aucun accès disque ici : la création du dossier est faite
+        au démarrage de l'application (ensure_template_dir)
+        """
+        # Un chemin relatif est résolu depuis le dossier Emails
+        # (où se trouve ce fichier), puis normalisé
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        return os.path.abspath(os.path.join(base_dir, v))
+    
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=True,
+        extra="ignore"
+    )
+
+
+@lru_cache(maxsize=1)
+def get_email_settings() -> EmailSettings:
+    """
+    Charge la configuration une seule fois (lecture du .env + validation)
+    """
+    return EmailSettings()
+
+
+def ensure_template_dir(path: Optional[str] = None) -> None:
+    """
+    Crée le dossier templates s'il n'existe pas
+
+    Appelé une seule fois au démarrage de l'application, plutôt qu'à
+    chaque import du module.
+    """
+    path = path or get_email_settings().MAIL_TEMPLATES_DIR
+    if path in _checked:
+        return
+    
+    if not os.path.exists(path):
+        os.makedirs(path, exist_ok=True)
+        logger.info(f"Dossier templates créé: {path}")
     
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = True
+    _checked.add(path)
 
 
 # Instance singleton pour utilisation dans l'application
-email_settings = EmailSettings()
+email_settings = get_email_settings()
         
\ No newline at end of file
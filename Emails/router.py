@@ -1,13 +1,26 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from Emails.service import email_service
+from Emails.config_email import email_settings
 from Emails.schemas import ContactFormRequest, ContactFormResponse, HealthResponse
+from typing import Any
 import logging
 import re
 
 
 logger = logging.getLogger(__name__)
 
+# === STATUT DU SERVICE ===
+# La configuration ne change pas pendant l'exécution : calculé une seule fois
+_HEALTH = {
+    "status": "operational",
+    "smtp_server": f"{email_settings.MAIL_SERVER}:{email_settings.MAIL_PORT}",
+    "mail_from": email_settings.MAIL_FROM,
+    "tls_enabled": email_settings.MAIL_SSL_TLS,
+    "recipients_count": len(email_settings.MAIL_RECIPIENTS_CONTACT)
+}
+
+
 # === CREATION DU ROUTER ===
 router = APIRouter(
     prefix="/contact",
@@ -18,6 +31,8 @@ router = APIRouter(
 # === ENDPOINTS API ===
 @router.post(
     "/submit",
+    # Le service renvoie un dict : FastAPI le valide et le sérialise une
+    # seule fois via response_model (pas de ContactFormResponse(**result))
     response_model=ContactFormResponse,
     status_code=status.HTTP_200_OK,
     summary="Soumettre un formulaire de contact",
@@ -50,7 +65,7 @@ router = APIRouter(
 async def submit_contact_form(
     form_data: ContactFormRequest,
     background_tasks: BackgroundTasks
-) -> ContactFormResponse:
+) -> dict[str, Any]:
     """
     Traite la soumission d'un formulaire de contact
     
@@ -59,7 +74,7 @@ async def submit_contact_form(
         background_tasks: Gestionnaire FastAPI pour tâches asynchrones
         
     Returns:
-        ContactFormResponse avec confirmation
+        Dict au format ContactFormResponse avec confirmation
         
     Raises:
         HTTPException: En cas d'erreur validation (géré par Pydantic)
@@ -87,8 +102,8 @@ async def submit_contact_form(
             f"Formulaire traité avec succès pour {form_data.email}"
         )
         
-        # Retour de la réponse formatée
-        return ContactFormResponse(**result)
+        # Retour de la réponse (déjà au format ContactFormResponse)
+        return result
 
     except Exception as e:
         # Gestion d'erreur globale (ne devrait jamais arriver)
@@ -99,11 +114,11 @@ async def submit_contact_form(
         
         # On retourne quand même un succès pour ne pas bloquer l'utilisateur
         # L'erreur est loggée et peut être inverstiguée
-        return ContactFormResponse(
-            success=True,
-            message="Votre message a été reçu. Nous vous contacterons bientôt.",
-            timestamp=datetime.now().isoformat()
-        )
+        return {
+            "success": True,
+            "message": "Votre message a été reçu. Nous vous contacterons bientôt.",
+            "timestamp": datetime.now(timezone.utc)
+        }
 
 
 @router.get(
@@ -125,12 +140,4 @@ async def check_email_service_health() -> dict[str, any]:
     Returns:
         Status du service avec détails de configuration
     """
-    from Emails.config_email import email_settings
-    
-    return {
-        "status": "operational",
-        "smtp_server": f"{email_settings.MAIL_SERVER}:{email_settings.MAIL_PORT}",
-        "mail_from": email_settings.MAIL_FROM,
-        "tls_enabled": email_settings.MAIL_SSL_TLS,
-        "recipients_count": len(email_settings.MAIL_RECIPIENTS_CONTACT)
-    }
\ No newline at end of file
+    return _HEALTH
\ No newline at end of file
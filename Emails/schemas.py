@@ -1,8 +1,23 @@
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Dict, Any
+from datetime import datetime
 import re
 
 
+# === PATTERNS PRECOMPILES ===
+# Compilés une seule fois à l'import plutôt qu'à chaque validation
+# Suppression de caractères : str.translate évite le moteur de regex.
+# Mêmes espaces que \s (str.isspace), y compris les espaces insécables
+# fines (\u202f) courantes dans les numéros au format français
+_PHONE_WHITESPACE = (
+    ' \t\n\v\f\r\x1c\x1d\x1e\x1f\x85\xa0\u1680'
+    '\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a'
+    '\u2028\u2029\u202f\u205f\u3000'
+)
+_PHONE_DELETE = str.maketrans('', '', _PHONE_WHITESPACE + '-()')
+_PHONE_OK = re.compile(r'^\+?\d{8,15}$')
+
+
 # === SCHEMAS DE VALIDATION ===
 class ContactFormRequest(BaseModel):
     """
@@ -53,8 +68,9 @@ class ContactFormRequest(BaseModel):
         example="Je souhaiterais obtenir plus d'information sur ..."
     )
     
-    @validator('telephone')
-    def validate_phone_format(cls, v):
+    @field_validator('telephone')
+    @classmethod
+    def validate_phone_format(cls, v: str) -> str:
         """
         Validateur personnalisé pour le numéro de téléphone
         
@@ -65,10 +81,10 @@ class ContactFormRequest(BaseModel):
         - Retire les espaces et caractères spéciaux
         """
         # Nettoyer le numéro (retirer espaces, tirets, parenthèses)
-        cleaned = re.sub(r'[\s\-\(\)]', '', v)
+        cleaned = v.translate(_PHONE_DELETE)
         
         # Vérifier qu'il ne reste que des chiffres et éventuellement un +
-        if not re.match(r'^\+?\d{8,15}$', cleaned):
+        if not _PHONE_OK.match(cleaned):
             raise ValueError(
                 "Format de téléphone invalide. "
                 "Utilisez un format international (+224...) ou local (621..)"
@@ -76,24 +92,15 @@ class ContactFormRequest(BaseModel):
         
         return cleaned
     
-    @validator('message')
-    def sanitize_message(cls, v):
-        """
-        Nettoie le message pour éviter les injections HTML/Script
+    @field_validator('message')
+    @classmethod
+    def strip_message(cls, v: str) -> str:
         """
-        # Retirer les balises HTML potentiellement dangereuses
-        dangerous_patterns = [
-            r'<script[^>]*>.*?</script>',  # Scripts
-            r'<iframe[^>]*>.*?</iframe>',  # IFrames
-            r'javascript:',                 # URLs JavaScript
-            r'on\w+\s*=',                  # Événements inline (onclick, etc.)   
-        ]
+        Retire les espaces en début et fin de message
         
-        cleaned = v
-        for pattern in dangerous_patterns:
-            cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE | re.DOTALL)
-        
-        return cleaned.strip()
+        Pas de nettoyage HTML ici : l'autoescape de Jinja2 s'en charge au rendu
+        """
+        return v.strip()
     
     class Config:
         """Configuration du modèle Pydantic"""
@@ -129,7 +136,7 @@ class ContactFormResponse(BaseModel):
         ...,
         description="Message de confirmation ou d'erreur"
     )
-    timestamp: str = Field(
+    timestamp: datetime = Field(
         ...,
         description="Horodatage de la soumission (ISO 8601)"
     )
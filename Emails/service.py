@@ -1,12 +1,19 @@
 """Service d'envoi d'emails
 """
-import os
+import asyncio
+import string
+from html import escape
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import aiosmtplib
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
+from fastapi_mail.fastmail import email_dispatched
 from fastapi import BackgroundTasks
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from Emails.config_email import email_settings
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-from datetime import datetime
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape, meta
+from datetime import datetime, timezone
 from pathlib import Path
 import logging
 
@@ -17,11 +24,8 @@ logger = logging.getLogger(__name__)
 
 
 # === CONFIGURATION JINJA2 ===
-# Vérifier que le dossier templates existe
+# Le dossier templates est créé au démarrage (voir ensure_template_dir)
 template_dir = email_settings.MAIL_TEMPLATES_DIR
-if not os.path.exists(template_dir):
-    os.makedirs(template_dir, exist_ok=True)
-    logger.info(f"Dossier templates créé: {template_dir}")
 
 # Créer l'environnement Jinja2 pour le rendu des templates
 jinja_env = Environment(
@@ -35,12 +39,49 @@ jinja_env = Environment(
     trim_blocks=True,
     
     # Lstrip blocks : retire les espaces au début des lignes
-    lstrip_blocks=True
+    lstrip_blocks=True,
+    
+    # Pas de vérification de date de modification des fichiers en production,
+    # et cache illimité : un template compilé n'est jamais évincé
+    auto_reload=False,
+    cache_size=-1,
+    
+    # Bytecode des templates conservé sur disque (dossier temporaire propre à
+    # l'utilisateur) : les autres workers et les redémarrages ne recompilent pas
+    bytecode_cache=FileSystemBytecodeCache()
 )
 
+# Templates précompilés au démarrage : le rendu devient un appel en mémoire
+_TEMPLATES = {}
+for _name in ("notification_interne.html", "confirmation_visiteur.html"):
+    try:
+        _TEMPLATES[_name] = jinja_env.get_template(_name)
+    except Exception as e:
+        # Le template sera rechargé (ou remplacé par le fallback) au rendu
+        logger.error(f"Impossible de précharger le template '{_name}': {str(e)}")
+
+# La confirmation visiteur ne dépend que de quelques variables (nom, sujet,
+# date) : son rendu est mis en cache, clé = valeurs de ces seules variables.
+# La notification interne contient le message, presque toujours unique.
+_TEMPLATE_VARS = {}
+for _name in ("confirmation_visiteur.html",):
+    if _name in _TEMPLATES:
+        _source = jinja_env.loader.get_source(jinja_env, _name)[0]
+        _TEMPLATE_VARS[_name] = tuple(sorted(
+            meta.find_undeclared_variables(jinja_env.parse(_source))
+        ))
+
+
+@lru_cache(maxsize=128)
+def _render_cached(template_name: str, values: Tuple[Tuple[str, Any], ...]) -> str:
+    """Rend un template précompilé, mémorisé selon les valeurs utilisées"""
+    return _TEMPLATES[template_name].render(dict(values))
+
 
 # === CONFIGURATION CONNEXION SMTP ===
 # Cette configuration est créée une fois au démarrage de l'application
+# Pas de TEMPLATE_FOLDER : le HTML est déjà rendu par jinja_env ci-dessus,
+# fastapi-mail n'a pas besoin de son propre environnement Jinja2
 mail_config = ConnectionConfig(
     MAIL_USERNAME=email_settings.MAIL_USERNAME,
     MAIL_PASSWORD=email_settings.MAIL_PASSWORD,
@@ -50,11 +91,203 @@ mail_config = ConnectionConfig(
     MAIL_STARTTLS=email_settings.MAIL_STARTTLS,
     MAIL_SSL_TLS=email_settings.MAIL_SSL_TLS,
     USE_CREDENTIALS=email_settings.USE_CREDENTIALS,
-    VALIDATE_CERTS=email_settings.VALIDATE_CERTS,
-    TEMPLATE_FOLDER=email_settings.MAIL_TEMPLATES_DIR
+    VALIDATE_CERTS=email_settings.VALIDATE_CERTS
 )
 
 
+# === HTML DE SECOURS ===
+# Gabarit analysé une seule fois, utilisé si un template Jinja2 échoue
+_FALLBACK_FIELDS = ('nom', 'email', 'telephone', 'sujet', 'message')
+_FALLBACK_TPL = string.Template("""
+                <!DOCTYPE html>
+                <html>
+                <body style="font-family: Arial, sans-serif; padding: 20px;">
+                    <h2>Nouveau Message de Contact</h2>
+                    <p><strong>Nom :</strong> ${nom}</p>
+                    <p><strong>Email :</strong> ${email}</p>
+                    <p><strong>Téléphone :</strong> ${telephone}</p>
+                    <p><strong>Sujet :</strong> ${sujet}</p>
+                    <p><strong>Message :</strong></p>
+                    <pre>${message}</pre>
+                </body>
+                </html>
+            """)
+
+
+class _PooledSMTP(aiosmtplib.SMTP):
+    """
+    Session SMTP qui retient si MAIL FROM a été accepté pour le message
+    en cours : tant que ce n'est pas le cas, rien n'a été transmis et le
+    message peut être renvoyé sans risque de doublon.
+    """
+
+    mail_accepted = False
+
+    async def send_message(self, *args, **kwargs):
+        self.mail_accepted = False
+        return await super().send_message(*args, **kwargs)
+
+    async def mail(self, *args, **kwargs):
+        response = await super().mail(*args, **kwargs)
+        self.mail_accepted = True
+        return response
+
+
+class SMTPPool:
+    """
+    Pool de connexions SMTP persistantes partagées entre les envois
+
+    POURQUOI ?
+    ----------
+    FastMail ouvre une nouvelle connexion (TCP + STARTTLS + AUTH) à chaque
+    send_message. Sur une liaison TLS cette poignée de main coûte plus cher
+    que l'envoi lui-même. On garde donc quelques sessions ouvertes et on les
+    réutilise tant qu'elles répondent.
+
+    Au plus `size` sessions sont utilisées en même temps : deux emails
+    peuvent ainsi partir en parallèle sur deux connexions distinctes.
+
+    close() ferme les sessions libres et fait passer le pool à une nouvelle
+    génération : une session encore prêtée à ce moment est fermée quand
+    elle est rendue, au lieu de revenir dans le pool.
+    """
+
+    # Au-delà de ce délai d'inactivité, on vérifie la session avec NOOP
+    IDLE_CHECK_SECONDS = 30
+
+    def __init__(self, config: ConnectionConfig, size: int = 2):
+        self.config = config
+        self.size = size
+        # Sessions libres : couples (session, dernière utilisation)
+        self._idle: List[Tuple[aiosmtplib.SMTP, float]] = []
+        self._semaphore = asyncio.Semaphore(size)
+        # Incrémentée à chaque close()
+        self._generation = 0
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        """Ouvre une nouvelle session SMTP authentifiée"""
+        smtp = _PooledSMTP(
+            hostname=self.config.MAIL_SERVER,
+            port=self.config.MAIL_PORT,
+            timeout=self.config.TIMEOUT,
+            use_tls=self.config.MAIL_SSL_TLS,
+            start_tls=self.config.MAIL_STARTTLS,
+            validate_certs=self.config.VALIDATE_CERTS,
+            local_hostname=self.config.LOCAL_HOSTNAME,
+            cert_bundle=self.config.CERT_BUNDLE,
+        )
+        try:
+            await smtp.connect()
+
+            if self.config.USE_CREDENTIALS:
+                await smtp.login(
+                    self.config.MAIL_USERNAME,
+                    self.config.MAIL_PASSWORD.get_secret_value()
+                )
+        except BaseException:
+            # aiosmtplib ne ferme pas la connexion si l'AUTH échoue :
+            # ne pas laisser de session TCP/TLS à moitié ouverte
+            self._drop(smtp)
+            raise
+
+        logger.info(
+            f"Connexion SMTP ouverte: {self.config.MAIL_SERVER}:{self.config.MAIL_PORT}"
+        )
+        return smtp
+
+    @staticmethod
+    def _drop(smtp: aiosmtplib.SMTP):
+        """Abandonne une session (sans lever d'erreur)"""
+        try:
+            smtp.close()
+        except Exception:
+            pass
+
+    @classmethod
+    async def _quit(cls, smtp: aiosmtplib.SMTP):
+        """Ferme proprement une session (QUIT), sans lever d'erreur"""
+        if smtp.is_connected:
+            try:
+                await smtp.quit()
+            except Exception:
+                pass
+        cls._drop(smtp)
+
+    async def _checkout(self) -> aiosmtplib.SMTP:
+        """Retourne une session libre et valide, en ouvre une si nécessaire"""
+        while self._idle:
+            smtp, last_used = self._idle.pop()
+
+            if not smtp.is_connected:
+                self._drop(smtp)
+                continue
+
+            # Session inactive depuis longtemps : le serveur a pu la fermer
+            if time.monotonic() - last_used > self.IDLE_CHECK_SECONDS:
+                try:
+                    await smtp.noop()
+                except (aiosmtplib.SMTPException, asyncio.TimeoutError, OSError):
+                    self._drop(smtp)
+                    continue
+
+            return smtp
+
+        return await self._connect()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        """
+        Prête une session SMTP à l'appelant, pour son usage exclusif
+
+        En cas de déconnexion ou de timeout pendant l'utilisation,
+        la session est abandonnée et sera recréée au prochain envoi.
+        """
+        generation = self._generation
+        async with self._semaphore:
+            smtp = await self._checkout()
+            try:
+                yield smtp
+            except (aiosmtplib.SMTPServerDisconnected, asyncio.TimeoutError):
+                self._drop(smtp)
+                smtp = None
+                raise
+            except aiosmtplib.SMTPException:
+                # Erreur de transaction : on remet la session à zéro (RSET)
+                try:
+                    await smtp.rset()
+                except Exception:
+                    self._drop(smtp)
+                    smtp = None
+                raise
+            finally:
+                if smtp is not None:
+                    if generation == self._generation:
+                        self._idle.append((smtp, time.monotonic()))
+                    else:
+                        # Pool fermé pendant l'utilisation : ne pas la garder
+                        await self._quit(smtp)
+
+    async def close(self):
+        """
+        Ferme proprement les sessions (appelé à l'arrêt de l'application)
+
+        Les sessions prêtées sont fermées à leur retour. Le pool reste
+        utilisable ensuite, avec de nouvelles sessions.
+        """
+        self._generation += 1
+        # Nouveau sémaphore : l'ancien reste lié à la boucle d'événements
+        # qui s'arrête, les sessions prêtées le libèrent normalement
+        self._semaphore = asyncio.Semaphore(self.size)
+
+        idle, self._idle = self._idle, []
+        for smtp, _ in idle:
+            await self._quit(smtp)
+
+
+# Pool partagé par toute l'application
+smtp_pool = SMTPPool(mail_config)
+
+
 class EmailService:
     """
         Service centralisé pour l'envoi d'emails
@@ -67,12 +300,12 @@ class EmailService:
         """
         Initialise le service avec la configuration SMTP
         
-        FastMail est un client qui gère :
-        - La connexion au serveur SMTP
-        - Le formatage des emails
-        - La gestion des erreurs de connexion
+        - FastMail ne sert qu'à construire les messages MIME (get_message)
+        - self.smtp_pool gère les connexions au serveur SMTP, leur
+          réutilisation et les erreurs de connexion
         """
         self.fast_mail = FastMail(mail_config)
+        self.smtp_pool = smtp_pool
         
     async def send_contact_form_submission(
         self,
@@ -93,7 +326,7 @@ class EmailService:
         ----------
         1. Prépare les données pour les templates
         2. Génère les emails HTML à partir des templates Jinja2
-        3. Envoie les deux emails en arrière-plan
+        3. Confie les deux emails au worker d'envoi (ou à une tâche en arrière-plan)
         4. Retourne un statut de succès
         
         Args:
@@ -108,8 +341,12 @@ class EmailService:
             Dict avec status et message de confirmation
         """
         
-        # Date/heure actuelle formatée
-        date_reception = datetime.now().strftime("%d/%m/%Y à %H:%M")
+        # Date/heure actuelle, calculée une seule fois pour toute la requête :
+        # UTC pour l'horodatage de la réponse, heure locale du serveur
+        # pour l'affichage dans les emails
+        now = datetime.now(timezone.utc)
+        local_now = now.astimezone()
+        date_reception = f"{local_now:%d/%m/%Y} à {local_now:%H:%M}"
         
         # === PREPARATION DES DONNEES POUR LES TEMPLATES ===
         # Ces variables seront disponibles dans les templates Jinja2
@@ -119,7 +356,8 @@ class EmailService:
             'telephone': telephone,
             'sujet': sujet,
             'message': message,
-            'date_reception': date_reception
+            'date_reception': date_reception,
+            'timestamp': now
         }
         
         # === EMAIL POUR l'EQUIPE (Notification interne) ===
@@ -149,18 +387,18 @@ class EmailService:
         )
 
         # === ENVOI ASYNCHRONE EN ARRIÈRE-PLAN ===
-        # Les emails sont ajoutés à une queue de tâches en arrière-plan
-        background_tasks.add_task(
-            self._send_email_with_logging,
-            internal_message,
-            "notification interne"
-        )
-        
-        background_tasks.add_task(
-            self._send_email_with_logging,
-            visitor_message,
-            "confirmation visiteur"
-        )
+        # Les emails sont confiés au worker d'envoi (voir _mail_worker).
+        # Si la file est pleine ou le worker arrêté, on retombe sur une
+        # tâche d'arrière-plan FastAPI : les deux emails partent en parallèle
+        if not _enqueue([
+            (internal_message, "notification interne"),
+            (visitor_message, "confirmation visiteur")
+        ]):
+            background_tasks.add_task(
+                self._send_both_concurrent,
+                internal_message,
+                visitor_message
+            )
         
         logger.info(
             f"Emails programmés pour envoi - Contact: {nom} <{email}>"
@@ -169,7 +407,7 @@ class EmailService:
         return {
             "success": True,
             "message": "Votre message a été envoyé avec succès. Nous vous répondrons dans les plus brefs délais.",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": now
         }
         
     
@@ -186,7 +424,7 @@ class EmailService:
         
         FONCTIONNEMENT :
         ---------------
-        1. Charge le template depuis Email/templates/
+        1. Récupère le template précompilé (ou le charge depuis Email/templates/)
         2. Injecte les variables du contexte dans le template
         3. Retourne le HTML final généré
         
@@ -198,11 +436,21 @@ class EmailService:
             HTML généré à partir du template
         """
         try: 
-            # Charger le template
-            template = jinja_env.get_template(template_name)
-            
-            # Générer le HTML en injectant les variables
-            html = template.render(**context)
+            variables = _TEMPLATE_VARS.get(template_name)
+            if variables is not None:
+                # Rendu mis en cache : seules les variables du template comptent
+                html = _render_cached(
+                    template_name,
+                    tuple((k, context[k]) for k in variables if k in context)
+                )
+            else:
+                # Template précompilé, sinon chargement classique
+                template = _TEMPLATES.get(template_name)
+                if template is None:
+                    template = jinja_env.get_template(template_name)
+                
+                # Générer le HTML en injectant les variables
+                html = template.render(**context)
             
             logger.debug(f"Template '{template_name}' rendu avec succès.")
             
@@ -227,26 +475,19 @@ class EmailService:
         on ne veut pas que l'email échoue complètement. On envoie donc
         un HTML minimal mais fonctionnel.
         
+        Les données ne sont pas nettoyées à la validation : on les échappe
+        ici, comme le fait l'autoescape de Jinja2 pour les templates.
+        
         Args:
             context: Données à afficher
             
         Returns:
             HTML simple avec les données de base
         """
-        return f""" 
-                <!DOCTYPE html>
-                <html>
-                <body style="font-family: Arial, sans-serif; padding: 20px;">
-                    <h2>Nouveau Message de Contact</h2>
-                    <p><strong>Nom :</strong> {context.get('nom', 'N/A')}</p>
-                    <p><strong>Email :</strong> {context.get('email', 'N/A')}</p>
-                    <p><strong>Téléphone :</strong> {context.get('telephone', 'N/A')}</p>
-                    <p><strong>Sujet :</strong> {context.get('sujet', 'N/A')}</p>
-                    <p><strong>Message :</strong></p>
-                    <pre>{context.get('message', 'N/A')}</pre>
-                </body>
-                </html>
-            """
+        return _FALLBACK_TPL.substitute({
+            key: escape(str(context.get(key, 'N/A')))
+            for key in _FALLBACK_FIELDS
+        })
         
     async def _send_email_with_logging(
         self,
@@ -260,19 +501,228 @@ class EmailService:
             message: Le message à envoyer
             email_type: Type d'email pour les logs ("notification interne", etc.)
         """
-        try: 
-            await self.fast_mail.send_message(message)
-            logger.info(f"Email envoyé avec succès: {email_type}")
+        await self._send_pair([(message, email_type)])
+    
+    async def _send_both_concurrent(
+        self,
+        internal_message: MessageSchema,
+        visitor_message: MessageSchema
+    ):
+        """
+        Envoie la notification interne et la confirmation visiteur en parallèle
+        
+        Les deux emails sont indépendants : chacun prend sa propre session
+        dans le pool SMTP, ce qui réduit la durée totale de la tâche.
+        _send_email_with_logging ne lève jamais d'exception, un échec
+        n'interrompt donc pas l'autre envoi.
+        
+        Args:
+            internal_message: Notification pour l'équipe
+            visitor_message: Confirmation pour le visiteur
+        """
+        await asyncio.gather(
+            self._send_email_with_logging(internal_message, "notification interne"),
+            self._send_email_with_logging(visitor_message, "confirmation visiteur")
+        )
+    
+    async def _send_pair(
+        self,
+        messages: List[Tuple[MessageSchema, str]]
+    ):
+        """
+        Envoie plusieurs emails à la suite sur une seule session SMTP
+        
+        POURQUOI ?
+        ----------
+        Une soumission de formulaire produit deux emails (notification
+        interne + confirmation visiteur). Les envoyer dans la même tâche,
+        sans relâcher la connexion entre les deux, évite de payer deux fois
+        la poignée de main TCP/TLS/AUTH.
+        
+        Args:
+            messages: Liste de couples (message, type d'email pour les logs)
+        """
+        # FastMail ne sert plus qu'à construire les messages MIME,
+        # l'envoi passe par la connexion persistante du pool
+        pending = []
+        for message, email_type in messages:
+            try:
+                pending.append((await self.fast_mail.get_message(message), email_type))
+            except Exception as e:
+                logger.error(f"Erreur envoi email ({email_type}): {str(e)}",
+                             exc_info=True)
+        
+        # Aucun message construit : inutile d'ouvrir une session SMTP
+        if not pending:
+            return
+        
+        # Mode test (SUPPRESS_SEND) : comme FastMail, aucun envoi réel,
+        # mais le signal email_dispatched est émis (record_messages)
+        if self.fast_mail.config.SUPPRESS_SEND:
+            for mime, email_type in pending:
+                email_dispatched.send(mime)
+                logger.info(f"Envoi désactivé (SUPPRESS_SEND): {email_type}")
+            return
+        
+        # Nouvelle tentative (une seule) uniquement si une session réutilisée
+        # était déjà fermée côté serveur avant MAIL FROM : rien n'a été
+        # transmis, le message ne peut pas être reçu en double.
+        # Après un timeout ou une coupure en cours de transaction, le serveur
+        # a pu accepter le message : il est loggé en échec, sans renvoi.
+        retried = False
+        while pending:
+            reconnect = False
+            try:
+                async with self.smtp_pool.acquire() as smtp:
+                    while pending:
+                        mime, email_type = pending[0]
+                        try:
+                            await smtp.send_message(mime)
+                        except (aiosmtplib.SMTPServerDisconnected, asyncio.TimeoutError) as e:
+                            stale = (
+                                isinstance(e, aiosmtplib.SMTPServerDisconnected)
+                                and not getattr(smtp, "mail_accepted", True)
+                            )
+                            if stale and not retried:
+                                # Le message reste en tête de liste
+                                retried = True
+                            else:
+                                pending.pop(0)
+                                logger.error(f"Erreur envoi email ({email_type}): {str(e)}",
+                                             exc_info=True)
+                            # Le pool abandonne la session, les messages
+                            # restants partent sur une nouvelle connexion
+                            reconnect = True
+                            raise
+                        except Exception as e:
+                            # Erreur propre à ce message : retiré de la liste
+                            # (donc loggé une seule fois), on passe au suivant
+                            pending.pop(0)
+                            logger.error(f"Erreur envoi email ({email_type}): {str(e)}",
+                                         exc_info=True)
+                            await smtp.rset()
+                            continue
+                        
+                        pending.pop(0)
+                        email_dispatched.send(mime)
+                        logger.info(f"Email envoyé avec succès: {email_type}")
+                return
             
-        except Exception as e:
-            # Ne pas faire échouer l'application pour une erreur email
-            # Juste logguer l'erreur pour investigation
-            logger.error(f"Erreur envoi email ({email_type}): {str(e)}",
-                         exc_info=True)
+            except Exception as e:
+                if reconnect:
+                    continue
+                # Ne pas faire échouer l'application pour une erreur email
+                # Juste logguer l'erreur pour investigation
+                for _, email_type in pending:
+                    logger.error(f"Erreur envoi email ({email_type}): {str(e)}",
+                                 exc_info=True)
+                return
 
 
 # === INSTANCE SINGLETON ===
 email_service = EmailService()
 
-    
-    
\ No newline at end of file
+
+# === FILE D'ENVOI ===
+# Un worker unique consomme la file en continu : le rythme des soumissions
+# est découplé de celui du serveur SMTP, et les emails de plusieurs requêtes
+# sont regroupés sur une même session SMTP.
+# La file est créée par start_mail_worker, sur la boucle d'événements de
+# l'application : une file créée à l'import resterait liée à la première
+# boucle qui l'utilise
+_QUEUE: Optional["asyncio.Queue[Tuple[MessageSchema, str]]"] = None
+_QUEUE_MAXSIZE = 1000
+
+# Nombre maximal d'emails par lot, et attente maximale pour compléter un lot
+_BATCH_SIZE = 20
+_BATCH_WAIT_SECONDS = 0.05
+
+_worker_task: Optional[asyncio.Task] = None
+
+
+def _enqueue(messages: List[Tuple[MessageSchema, str]]) -> bool:
+    """
+    Ajoute des emails à la file d'envoi
+
+    Returns:
+        False si le worker ne tourne pas ou si la file n'a pas la place
+        pour tous les messages (rien n'est alors ajouté)
+    """
+    if _QUEUE is None or _worker_task is None or _worker_task.done():
+        return False
+    if _QUEUE.maxsize - _QUEUE.qsize() < len(messages):
+        logger.warning("File d'envoi pleine, envoi en tâche d'arrière-plan")
+        return False
+
+    for item in messages:
+        _QUEUE.put_nowait(item)
+    return True
+
+
+async def _mail_worker(queue: "asyncio.Queue[Tuple[MessageSchema, str]]"):
+    """
+    Consomme la file d'envoi par lots
+
+    Attend un premier email, complète le lot avec ceux qui arrivent dans
+    les _BATCH_WAIT_SECONDS suivantes, puis envoie le tout sur une seule
+    session SMTP (_send_pair).
+    """
+    while True:
+        batch = [await queue.get()]
+        try:
+            while len(batch) < _BATCH_SIZE:
+                try:
+                    batch.append(
+                        await asyncio.wait_for(queue.get(), _BATCH_WAIT_SECONDS)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            await email_service._send_pair(batch)
+
+        except Exception as e:
+            # _send_pair logge déjà ses erreurs : ne jamais arrêter le worker
+            logger.error(f"Erreur du worker d'envoi: {str(e)}", exc_info=True)
+
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+
+def start_mail_worker():
+    """
+    Démarre le worker d'envoi (appelé au démarrage de l'application)
+
+    Doit être appelé depuis la boucle d'événements qui servira les requêtes.
+    """
+    global _QUEUE, _worker_task
+    if _worker_task is None or _worker_task.done():
+        _QUEUE = asyncio.Queue(maxsize=_QUEUE_MAXSIZE)
+        _worker_task = asyncio.create_task(_mail_worker(_QUEUE))
+
+
+async def stop_mail_worker(timeout: float = 10):
+    """
+    Arrête le worker d'envoi (appelé à l'arrêt de l'application)
+
+    Laisse jusqu'à `timeout` secondes pour vider la file avant d'annuler.
+    """
+    global _QUEUE, _worker_task
+    if _worker_task is None:
+        return
+
+    # Plus aucun ajout dans la file pendant l'arrêt (repli BackgroundTasks)
+    queue, task = _QUEUE, _worker_task
+    _QUEUE, _worker_task = None, None
+
+    if not task.done():
+        try:
+            await asyncio.wait_for(queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Arrêt du worker d'envoi: {queue.qsize()} email(s) non envoyé(s)")
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
@@ -0,0 +1,13 @@
+import os
+
+# Configuration minimale pour importer le module Emails sans fichier .env.
+# SUPPRESS_SEND : aucun email réel n'est envoyé pendant les tests
+os.environ.setdefault("MAIL_USERNAME", "test@example.com")
+os.environ.setdefault("MAIL_PASSWORD", "test")
+os.environ.setdefault("MAIL_FROM", "test@example.com")
+os.environ.setdefault("MAIL_SERVER", "localhost")
+os.environ.setdefault("MAIL_RECIPIENTS_CONTACT", "equipe@example.com")
+os.environ.setdefault("SUPPRESS_SEND", "1")
+
+# test_smtp.py est un script de diagnostic manuel (connexion SMTP réelle)
+collect_ignore = ["test_smtp.py"]
@@ -1,11 +1,26 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from Emails.router import router as email_router
+from Emails.service import smtp_pool, start_mail_worker, stop_mail_worker
+from Emails.config_email import ensure_template_dir
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ensure_template_dir()
+    start_mail_worker()
+    yield
+    # Vider la file d'envoi avant de fermer les sessions SMTP
+    await stop_mail_worker()
+    await smtp_pool.close()
 
 
 app = FastAPI(
     title= "Ville Propre API",
-    Version="1.0.0"
+    Version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -18,6 +33,7 @@ app.add_middleware(
 
 app.include_router(email_router)
 
+
 @app.get("/")
 def root():
     return {"message": "Welcome to Ville Propre API", "status": "operational"}
@@ -0,0 +1,206 @@
+"""Tests du worker d'envoi, des lots et des nouvelles tentatives SMTP
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from email.utils import parseaddr
+
+import aiosmtplib
+import pytest
+from fastapi.testclient import TestClient
+from fastapi_mail import MessageSchema, MessageType
+
+import main
+from Emails import service
+from Emails.service import email_service
+
+
+FORM = {
+    "nom": "Mamadou Diallo",
+    "email": "mamadou@example.com",
+    "telephone": "+224621234567",
+    "sujet": "Question sur les tarifs",
+    "message": "Je souhaite connaître vos tarifs..."
+}
+
+
+def make_message(recipient: str) -> MessageSchema:
+    return MessageSchema(
+        subject="Test",
+        recipients=[recipient],
+        body="<p>Test</p>",
+        subtype=MessageType.html
+    )
+
+
+class FakeSMTP:
+    """
+    Session SMTP factice : échoue selon `failures`, enregistre les envois
+
+    `mail_accepted` indique si l'échec survient après MAIL FROM accepté
+    """
+
+    def __init__(self, failures=None, mail_accepted=False):
+        self.failures = failures or {}
+        self.fail_after_mail = mail_accepted
+        self.mail_accepted = False
+        self.sent = []
+        self.rset_count = 0
+
+    async def send_message(self, mime):
+        recipient = parseaddr(mime["To"])[1]
+        if recipient in self.failures:
+            self.mail_accepted = self.fail_after_mail
+            raise self.failures.pop(recipient)
+        self.sent.append(recipient)
+
+    async def rset(self):
+        self.rset_count += 1
+
+
+class FakePool:
+    """Pool factice qui prête successivement les sessions données"""
+
+    def __init__(self, *sessions):
+        self.sessions = list(sessions)
+        self.acquired = 0
+
+    @asynccontextmanager
+    async def acquire(self):
+        self.acquired += 1
+        yield self.sessions.pop(0)
+
+
+@pytest.fixture
+def real_send(monkeypatch):
+    """Désactive SUPPRESS_SEND pour passer par le pool (factice)"""
+    monkeypatch.setattr(email_service.fast_mail.config, "SUPPRESS_SEND", 0)
+
+
+def test_worker_restarts_with_new_event_loop():
+    # Deux cycles de vie successifs = deux boucles d'événements différentes
+    for _ in range(2):
+        with email_service.fast_mail.record_messages() as outbox:
+            with TestClient(main.app) as client:
+                response = client.post("/contact/submit", json=FORM)
+                assert response.status_code == 200
+
+        # L'arrêt de l'application vide la file avant de rendre la main
+        assert len(outbox) == 2
+
+
+def test_worker_groups_queued_emails_in_one_batch(monkeypatch):
+    batches = []
+
+    async def record_batch(messages):
+        batches.append([email_type for _, email_type in messages])
+
+    monkeypatch.setattr(email_service, "_send_pair", record_batch)
+
+    async def scenario():
+        service.start_mail_worker()
+        assert service._enqueue([(make_message("a@example.com"), "a")])
+        assert service._enqueue([
+            (make_message("b@example.com"), "b"),
+            (make_message("c@example.com"), "c")
+        ])
+        await service.stop_mail_worker()
+
+    asyncio.run(scenario())
+
+    assert batches == [["a", "b", "c"]]
+
+
+def test_enqueue_refused_when_worker_stopped():
+    assert not service._enqueue([(make_message("a@example.com"), "a")])
+
+
+def test_send_pair_retries_remaining_emails_after_disconnect(real_send, monkeypatch):
+    first = FakeSMTP(failures={
+        "b@example.com": aiosmtplib.SMTPServerDisconnected("fermée")
+    })
+    second = FakeSMTP()
+    pool = FakePool(first, second)
+    monkeypatch.setattr(email_service, "smtp_pool", pool)
+
+    asyncio.run(email_service._send_pair([
+        (make_message("a@example.com"), "a"),
+        (make_message("b@example.com"), "b"),
+        (make_message("c@example.com"), "c")
+    ]))
+
+    assert first.sent == ["a@example.com"]
+    assert second.sent == ["b@example.com", "c@example.com"]
+    assert pool.acquired == 2
+
+
+@pytest.mark.parametrize("error, mail_accepted", [
+    (aiosmtplib.SMTPReadTimeoutError("délai dépassé"), False),
+    (aiosmtplib.SMTPServerDisconnected("fermée"), True),
+])
+def test_send_pair_does_not_resend_after_transaction_started(
+    real_send, monkeypatch, error, mail_accepted
+):
+    # Le serveur a pu accepter le message : pas de renvoi (pas de doublon),
+    # les messages suivants partent sur une nouvelle session
+    first = FakeSMTP(failures={"a@example.com": error}, mail_accepted=mail_accepted)
+    second = FakeSMTP()
+    pool = FakePool(first, second)
+    monkeypatch.setattr(email_service, "smtp_pool", pool)
+
+    asyncio.run(email_service._send_pair([
+        (make_message("a@example.com"), "a"),
+        (make_message("b@example.com"), "b")
+    ]))
+
+    assert first.sent == []
+    assert second.sent == ["b@example.com"]
+
+
+def test_send_pair_retries_only_once(real_send, monkeypatch):
+    stale = aiosmtplib.SMTPServerDisconnected("fermée")
+    first = FakeSMTP(failures={"a@example.com": stale})
+    second = FakeSMTP(failures={"a@example.com": stale})
+    third = FakeSMTP()
+    monkeypatch.setattr(email_service, "smtp_pool", FakePool(first, second, third))
+
+    asyncio.run(email_service._send_pair([
+        (make_message("a@example.com"), "a"),
+        (make_message("b@example.com"), "b")
+    ]))
+
+    assert second.sent == []
+    assert third.sent == ["b@example.com"]
+
+
+def test_send_pair_logs_each_failure_once(real_send, monkeypatch, caplog):
+    smtp = FakeSMTP(failures={
+        "a@example.com": aiosmtplib.SMTPRecipientsRefused([])
+    })
+    monkeypatch.setattr(email_service, "smtp_pool", FakePool(smtp))
+
+    with caplog.at_level(logging.ERROR, logger=service.logger.name):
+        asyncio.run(email_service._send_pair([
+            (make_message("a@example.com"), "a"),
+            (make_message("b@example.com"), "b")
+        ]))
+
+    assert smtp.sent == ["b@example.com"]
+    assert smtp.rset_count == 1
+    errors = [r.getMessage() for r in caplog.records]
+    assert len([m for m in errors if m.startswith("Erreur envoi email (a)")]) == 1
+
+
+def test_send_pair_skips_pool_when_no_message_built(real_send, monkeypatch):
+    async def broken_get_message(message):
+        raise ValueError("message invalide")
+
+    monkeypatch.setattr(email_service.fast_mail, "get_message", broken_get_message)
+    pool = FakePool()
+    monkeypatch.setattr(email_service, "smtp_pool", pool)
+
+    asyncio.run(email_service._send_pair([
+        (make_message("a@example.com"), "a")
+    ]))
+
+    assert pool.acquired == 0
@@ -0,0 +1,43 @@
+"""Tests des schémas de validation du formulaire de contact
+"""
+import sys
+
+import pytest
+
+from Emails.schemas import ContactFormRequest, _PHONE_WHITESPACE
+
+
+FORM = {
+    "nom": "Mamadou Diallo",
+    "email": "mamadou@example.com",
+    "telephone": "+224621234567",
+    "sujet": "Question sur les tarifs",
+    "message": "Je souhaite connaître vos tarifs..."
+}
+
+
+@pytest.mark.parametrize("telephone", [
+    "+224\u202f621\u202f23\u202f45\u202f67",   # espace insécable fine
+    "+224\u2009621\u200923\u200945\u200967",   # espace fine
+    "+224\u3000621\u300023\u300045\u300067",   # espace idéographique
+    "+224\xa0621\xa023\xa045\xa067",           # espace insécable
+    "+224 (621) 23-45-67",
+])
+def test_phone_separators_are_removed(telephone):
+    form = ContactFormRequest(**{**FORM, "telephone": telephone})
+
+    assert form.telephone == "+224621234567"
+
+
+def test_phone_whitespace_matches_regex_whitespace():
+    # Le tableau écrit à la main doit rester identique à \s (str.isspace)
+    expected = {chr(c) for c in range(sys.maxunicode + 1) if chr(c).isspace()}
+
+    assert set(_PHONE_WHITESPACE) == expected
+
+
+def test_message_is_stripped_but_not_rewritten():
+    form = ContactFormRequest(**{**FORM, "message": "\n  Bonjour <b>équipe</b>  \n"})
+
+    # Le HTML est conservé tel quel, il est échappé au rendu du template
+    assert form.message == "Bonjour <b>équipe</b>"
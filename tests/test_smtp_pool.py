@@ -0,0 +1,226 @@
+"""Tests du pool de connexions SMTP contre un serveur aiosmtpd local
+"""
+import asyncio
+import socket
+from email.message import EmailMessage
+
+import aiosmtplib
+import pytest
+from fastapi_mail import ConnectionConfig
+
+from Emails import service
+from Emails.service import SMTPPool, email_service
+
+# Serveur SMTP de test, absent des dépendances de l'application
+Controller = pytest.importorskip("aiosmtpd.controller").Controller
+
+
+class RecordingHandler:
+    """Enregistre, pour chaque email reçu, la connexion qui l'a transmis"""
+
+    def __init__(self):
+        self.received = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received.append((id(session), envelope.rcpt_tos))
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LocalSMTPServer:
+    """Serveur aiosmtpd local, redémarrable sur le même port"""
+
+    def __init__(self):
+        self.handler = RecordingHandler()
+        self.port = free_port()
+        self.controller = None
+
+    def start(self):
+        self.controller = Controller(self.handler, hostname="127.0.0.1", port=self.port)
+        self.controller.start()
+
+    def stop(self):
+        if self.controller is not None:
+            self.controller.stop()
+            self.controller = None
+
+    def restart(self):
+        # L'arrêt ferme toutes les connexions ouvertes côté serveur
+        self.stop()
+        self.start()
+
+
+@pytest.fixture
+def smtp_server():
+    server = LocalSMTPServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+def make_pool(server: LocalSMTPServer) -> SMTPPool:
+    config = ConnectionConfig(
+        MAIL_USERNAME="test@example.com",
+        MAIL_PASSWORD="test",
+        MAIL_FROM="test@example.com",
+        MAIL_PORT=server.port,
+        MAIL_SERVER="127.0.0.1",
+        MAIL_STARTTLS=False,
+        MAIL_SSL_TLS=False,
+        USE_CREDENTIALS=False,
+        VALIDATE_CERTS=False
+    )
+    return SMTPPool(config)
+
+
+def make_mime(recipient: str) -> EmailMessage:
+    mime = EmailMessage()
+    mime["From"] = "test@example.com"
+    mime["To"] = recipient
+    mime["Subject"] = "Test"
+    mime.set_content("Test")
+    return mime
+
+
+def test_session_is_reused_between_acquires(smtp_server):
+    pool = make_pool(smtp_server)
+
+    async def scenario():
+        async with pool.acquire() as first:
+            await first.send_message(make_mime("a@example.com"))
+        async with pool.acquire() as second:
+            await second.send_message(make_mime("b@example.com"))
+        await pool.close()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first is second
+    connections = {conn for conn, _ in smtp_server.handler.received}
+    assert len(connections) == 1
+
+
+def test_idle_session_checked_with_noop_and_replaced_after_restart(smtp_server, monkeypatch):
+    pool = make_pool(smtp_server)
+    monkeypatch.setattr(pool, "IDLE_CHECK_SECONDS", 0)
+
+    async def scenario():
+        async with pool.acquire() as first:
+            await first.send_message(make_mime("a@example.com"))
+
+        smtp_server.restart()
+
+        # Le NOOP échoue sur la session fermée : une nouvelle est ouverte
+        async with pool.acquire() as second:
+            await second.send_message(make_mime("b@example.com"))
+        await pool.close()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first is not second
+    assert [rcpt for _, rcpt in smtp_server.handler.received] == [
+        ["a@example.com"], ["b@example.com"]
+    ]
+
+
+def test_send_pair_resends_on_stale_session_after_restart(smtp_server, monkeypatch):
+    pool = make_pool(smtp_server)
+    monkeypatch.setattr(email_service, "smtp_pool", pool)
+    monkeypatch.setattr(email_service.fast_mail.config, "SUPPRESS_SEND", 0)
+
+    async def scenario():
+        async with pool.acquire() as stale:
+            pass
+
+        smtp_server.restart()
+        # La fermeture n'est pas encore vue côté client
+        assert stale.is_connected
+
+        # Pas de NOOP (session récente) : la coupure est vue à MAIL FROM,
+        # avant toute transmission, le message est renvoyé une fois
+        await email_service._send_pair([
+            (service.MessageSchema(
+                subject="Test",
+                recipients=["a@example.com"],
+                body="<p>Test</p>",
+                subtype=service.MessageType.html
+            ), "a")
+        ])
+        await pool.close()
+        return stale
+
+    stale = asyncio.run(scenario())
+
+    assert not stale.mail_accepted
+    assert [rcpt for _, rcpt in smtp_server.handler.received] == [["a@example.com"]]
+
+
+def test_two_concurrent_acquires_use_two_sessions(smtp_server):
+    pool = make_pool(smtp_server)
+
+    async def scenario():
+        async with pool.acquire() as first, pool.acquire() as second:
+            # Pool de taille 2 : une troisième demande doit attendre
+            third = asyncio.ensure_future(pool.acquire().__aenter__())
+            await asyncio.sleep(0.1)
+            assert not third.done()
+            await asyncio.gather(
+                first.send_message(make_mime("a@example.com")),
+                second.send_message(make_mime("b@example.com"))
+            )
+
+        # Une session rendue débloque la troisième demande
+        await asyncio.wait_for(third, 1)
+        await pool.close()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first is not second
+    connections = {conn for conn, _ in smtp_server.handler.received}
+    assert len(connections) == 2
+
+
+def test_session_dropped_after_disconnect(smtp_server):
+    pool = make_pool(smtp_server)
+
+    async def scenario():
+        with pytest.raises(aiosmtplib.SMTPServerDisconnected):
+            async with pool.acquire() as smtp:
+                raise aiosmtplib.SMTPServerDisconnected("fermée")
+        return smtp
+
+    smtp = asyncio.run(scenario())
+
+    assert not smtp.is_connected
+    assert pool._idle == []
+
+
+def test_session_checked_out_during_close_is_not_pooled(smtp_server):
+    pool = make_pool(smtp_server)
+
+    async def scenario():
+        async with pool.acquire() as smtp:
+            await pool.close()
+            # Toujours utilisable par son détenteur jusqu'à son retour
+            await smtp.send_message(make_mime("a@example.com"))
+
+        closed_idle = list(pool._idle)
+
+        # Le pool reste utilisable après close(), avec une nouvelle session
+        async with pool.acquire() as fresh:
+            await fresh.send_message(make_mime("b@example.com"))
+        await pool.close()
+        return smtp, fresh, closed_idle
+
+    smtp, fresh, closed_idle = asyncio.run(scenario())
+
+    assert not smtp.is_connected
+    assert closed_idle == []
+    assert fresh is not smtp